@@ -2,10 +2,39 @@
 
 """
 import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
 
-import numpy as np
 import serial
 
+# max ratings reported by GMAX, keyed by (port, device class name)
+_GMAX_CACHE = {}
+
+# setter source specialized per device class in HCS.__init_subclass__ if GENERATE_SETTERS is set, scale and
+# frame format are baked in. Mirrors HCS.set_voltage/HCS.set_current, keep both in sync
+_SETTER_TEMPLATE = '''
+def set_{name}(self, {name}):
+    """
+    Sets the desired {name}, raises if {name} >= soft limit
+    :param {name}: (float)
+    :return: (bool) True, inside pipeline() already before the command is sent. With async_io a
+        (Future) resolving once the device acknowledged the command
+    """
+    assert {name} <= self.limit_{name},\\
+        "Invalid range! {{}}{unit} > limit of {{}}{unit}".format({name}, self.limit_{name})
+    assert {name} > 0, "Negative {name} given"
+    if {name} < self.min_{name}:
+        self.logger.warning("Given {name} %s{unit} < %s{unit} minimum, setting to minimum {name}", {name},
+                            self.min_{name})
+        {name} = self.min_{name}
+    value = round({name} * {scale})
+    if value == self.{last}:
+        return self._unchanged()
+    return self._apply({frame!r} % value, "{last}", value)
+'''
+
 
 class HCS:
     """
@@ -14,51 +43,175 @@ class HCS:
     CR = b"\r"
     ACK = b"OK"
 
-    SET_DECIMALS = {
-        "U": None,
-        "I": None
-    }
+    # setter verbs, subclasses for firmware accepting short forms (e.g. b"V") may override them
+    CMD_VOLT = b"VOLT"
+    CMD_CURR = b"CURR"
+    CMD_OUT = b"SOUT"
 
-    DISPLAY_DECIMALS = {
-        "U": None,
-        "I": None
-    }
+    # pre-terminated frames of the fixed commands, output frames are rebuilt in __init_subclass__
+    _CMD_GMAX = b"GMAX" + CR
+    _CMD_GETS = b"GETS" + CR
+    _CMD_GETD = b"GETD" + CR
+    _CMD_ENABLE = CMD_OUT + b"0" + CR
+    _CMD_DISABLE = CMD_OUT + b"1" + CR
+    # reply terminator and length of a plain acknowledgement
+    _TERM = ACK + CR
+    _ACK_LEN = len(ACK + CR)
+
+    # decimals of voltage/current for setpoints (SET) and display values (DISP)
+    SET_DEC_U = None
+    SET_DEC_I = None
+    DISP_DEC_U = None
+    DISP_DEC_I = None
+
+    # scaling and field widths derived from the decimals, see __init_subclass__
+    SET_SCALE_U = None
+    SET_SCALE_I = None
+    SET_WIDTH_U = None
+    SET_WIDTH_I = None
+    DISP_SCALE_U = None
+    DISP_SCALE_I = None
+    DISP_WIDTH_U = None
+    DISP_WIDTH_I = None
 
     DEVICE_LIMITS = {
         "U": None,
         "I": None,
     }
 
+    # expected reply length in bytes for commands with a fixed size answer, see __init_subclass__
+    RESPONSE_LEN = {}
+
+    # serial driver buffer size in bytes (Windows only)
+    BUFFER_SIZE = 4096
+
+    # seconds a synchronous call waits for its reply with async_io
+    ASYNC_TIMEOUT = 5.0
+
+    # replace set_voltage/set_current by versions generated from _SETTER_TEMPLATE with constants baked in
+    GENERATE_SETTERS = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # the output is switched on by SOUT0 and off by SOUT1
+        cls._CMD_ENABLE = cls.CMD_OUT + b"0" + cls.CR
+        cls._CMD_DISABLE = cls.CMD_OUT + b"1" + cls.CR
+        if None in (cls.SET_DEC_U, cls.SET_DEC_I, cls.DISP_DEC_U, cls.DISP_DEC_I):
+            return
+        cls.SET_SCALE_U = 10 ** cls.SET_DEC_U
+        cls.SET_SCALE_I = 10 ** cls.SET_DEC_I
+        cls.SET_WIDTH_U = cls.SET_DEC_U + 2
+        cls.SET_WIDTH_I = cls.SET_DEC_I + 2
+        cls.DISP_SCALE_U = 10 ** cls.DISP_DEC_U
+        cls.DISP_SCALE_I = 10 ** cls.DISP_DEC_I
+        cls.DISP_WIDTH_U = cls.DISP_DEC_U + 2
+        cls.DISP_WIDTH_I = cls.DISP_DEC_I + 2
+        terminator = len(cls.CR + cls.ACK + cls.CR)
+        set_len = cls.SET_WIDTH_U + cls.SET_WIDTH_I + terminator
+        cls.RESPONSE_LEN = {
+            b"GMAX": set_len,
+            b"GETS": set_len,
+            # display values plus one byte for the CC/CV flag
+            b"GETD": cls.DISP_WIDTH_U + cls.DISP_WIDTH_I + 1 + terminator,
+            # plain acknowledgements
+            cls.CMD_OUT: cls._ACK_LEN,
+            cls.CMD_VOLT: cls._ACK_LEN,
+            cls.CMD_CURR: cls._ACK_LEN,
+        }
+        # setpoint frame formats, e.g. b"VOLT%03d\r"
+        cls._VOLT_FRAME = cls.CMD_VOLT + b"%%0%dd" % cls.SET_WIDTH_U + cls.CR
+        cls._CURR_FRAME = cls.CMD_CURR + b"%%0%dd" % cls.SET_WIDTH_I + cls.CR
+        if not cls.GENERATE_SETTERS:
+            return
+        # generate the setters with the constants above baked in
+        for name, unit, scale, frame, last in (("voltage", "V", cls.SET_SCALE_U, cls._VOLT_FRAME, "_last_volt"),
+                                               ("current", "A", cls.SET_SCALE_I, cls._CURR_FRAME, "_last_curr")):
+            if "set_" + name in cls.__dict__:
+                continue
+            namespace = {"__name__": __name__}
+            source = _SETTER_TEMPLATE.format(name=name, unit=unit, scale=scale, frame=frame, last=last)
+            exec(compile(source, "<{}.set_{}>".format(cls.__name__, name), "exec"), namespace)
+            setter = namespace["set_" + name]
+            setter.__qualname__ = "{}.set_{}".format(cls.__qualname__, name)
+            setattr(cls, "set_" + name, setter)
+
     def __init__(self, port="/dev/ttyUSB0", limit_voltage=None, limit_current=None, blind=False,
-                 logger=logging.getLogger(__name__)):
+                 logger=logging.getLogger(__name__), async_io=False, cache_max=False):
         """
         :param port: (str) serial port
         :param limit_voltage: (float) voltage soft-limit
         :param limit_current: (float) current soft-limit
         :param blind: (bool) switch to skip device detection
         :param logger: (logging.Logger) python logger instance
+        :param async_io: (bool) read replies in a background thread, setters and *_async getters
+            return without waiting for the device
+        :param cache_max: (bool) reuse max ratings from an earlier connection to the same port and
+            device class, this skips the GMAX query and thereby device detection
         """
         self.logger = logger
-        self.logger.info("Connecting to serial device at {}".format(port))
+        self.logger.info("Connecting to serial device at %s", port)
         self.port = port
         self.limit_voltage = limit_voltage
         self.limit_current = limit_current
+        # queued (cmd, parse, future) tuples while inside pipeline(), else None
+        self._pipe = None
+        # last values sent or queued, reset to None if a command fails or the state is unknown
+        self._last_volt = None
+        self._last_curr = None
+        self._last_out = None
+        # background reader, only used with async_io
+        self._rx_thread = None
         self.serial = serial.Serial(port=self.port, baudrate=9600, timeout=0.5)
-        self.max_voltage, self.max_current = self.get_max() if not blind else (1e3, 1e3)
-        self.logger.info("Max ratings for {}: {}V and {}A".format(self.port, self.max_voltage, self.max_current))
-        if self.limit_voltage is None:
-            self.limit_voltage = self.max_voltage
-        if self.limit_current is None:
-            self.limit_current = self.max_current
-        self.logger.info("Configuration soft-limits to {}V and {}A".format(limit_voltage, limit_current))
-        assert self.limit_voltage <= self.max_voltage, "Voltage limit > device maximum"
-        assert self.limit_current <= self.max_voltage, "Current limit > device maximum"
+        try:
+            if hasattr(self.serial, "set_buffer_size"):
+                # only available on Windows, where the driver buffers are small by default
+                self.serial.set_buffer_size(rx_size=self.BUFFER_SIZE, tx_size=self.BUFFER_SIZE)
+            if async_io:
+                # (cmd, parse, future) tuples written to the device and waiting for their reply
+                self._pending = deque()
+                # number of commands ever registered as pending
+                self._sent = 0
+                self._rx_lock = threading.Lock()
+                self._rx_running = True
+                # exception that stopped the background reader
+                self._rx_error = None
+                self._rx_thread = threading.Thread(target=self._rx_loop, daemon=True)
+                self._rx_thread.start()
+            if blind:
+                self.max_voltage, self.max_current = 1e3, 1e3
+            else:
+                key = (self.port, type(self).__name__)
+                if not cache_max or key not in _GMAX_CACHE:
+                    _GMAX_CACHE[key] = self.get_max()
+                self.max_voltage, self.max_current = _GMAX_CACHE[key]
+            self.logger.info("Max ratings for %s: %sV and %sA", self.port, self.max_voltage, self.max_current)
+            if self.limit_voltage is None:
+                self.limit_voltage = self.max_voltage
+            if self.limit_current is None:
+                self.limit_current = self.max_current
+            self.logger.info("Configuration soft-limits to %sV and %sA", self.limit_voltage, self.limit_current)
+            assert self.limit_voltage <= self.max_voltage, "Voltage limit > device maximum"
+            assert self.limit_current <= self.max_voltage, "Current limit > device maximum"
+        except BaseException:
+            # do not leave the port open or the reader running
+            self._close()
+            raise
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.logger.info("Terminating serial connection to {}".format(self.port))
+        self.logger.info("Terminating serial connection to %s", self.port)
+        self._close()
+
+    def _close(self):
+        """
+        Stops the background reader, if any, and closes the serial port
+        """
+        if self._rx_thread is not None:
+            self._rx_running = False
+            self._rx_thread.join()
+            self._fail_pending("Connection closed")
         self.serial.__exit__()
 
     @property
@@ -70,83 +223,385 @@ class HCS:
         if self.DEVICE_LIMITS["U"] is None:
             raise NotImplementedError
         else:
-            return self.DEVICE_LIMITS["U"][0]
+            return self.DEVICE_LIMITS["U"]
 
     @property
     def min_current(self):
         """
         Returns the minimal current for this device
-        :return: (float) minimal voltage
+        :return: (float) minimal current
         """
         if self.DEVICE_LIMITS["I"] is None:
             raise NotImplementedError
         else:
             return self.DEVICE_LIMITS["I"]
 
-    def _write(self, cmd):
+    def _expected_len(self, cmd):
         """
-
-        :param cmd: (bytes) command to send. e.g. b"GETS"
-        :return: (bytes) response
+        Looks up the reply length of a command by its verb
+        :param cmd: (bytes) command frame, e.g. b"VOLT120\r"
+        :return: (int) expected reply length in bytes, None if unknown
         """
-        self.logger.debug("Writing {}".format(cmd + self.CR))
-        self.serial.write(cmd + self.CR)
+        return self.RESPONSE_LEN.get(bytes(cmd.rstrip(b"0123456789\r")))
 
-    def _read(self):
+    def _read(self, expected=None):
         """
-        :return: (bytes) result
+        Reads a reply. If the reply length is known, it is read in one go, otherwise (or if the
+        reply is not terminated properly) the remainder is read line by line until ACK is
+        received. Nothing more is read if the fixed length read timed out without any data.
+        :param expected: (int) expected reply length in bytes, None if unknown
+        :return: (tuple) success, result
         """
-        result = self.serial.read_until(self.ACK + self.CR)
-        self.logger.debug("Received answer {}".format(result))
-        # command not accepted
-        if result == b"":
-            return False, b""
+        if expected is None:
+            result = b""
         else:
-            return True, result.rstrip(self.ACK + self.CR)
+            result = self.serial.read(expected)
+            if not result:
+                # timeout
+                self.logger.debug("Received no answer")
+                return False, result
+        while not result.endswith(self._TERM):
+            line = self.serial.read_until(self.CR)
+            if not line:
+                # timeout, command not accepted
+                self.logger.debug("Received answer %s", result)
+                return False, result
+            result += line
+        self.logger.debug("Received answer %s", result)
+        return True, result[:-len(self._TERM)].rstrip(self.CR)
 
-    def _execute(self, cmd):
+    def _execute(self, cmd, expected=None):
         """
         Executes a given command and evaluates the result
-        :param cmd: (bytes) command to send. e.g. b"GETS"
+        :param cmd: (bytes) CR terminated command to send. e.g. b"GETS\r"
+        :param expected: (int) expected reply length, looked up from the command if None
         :return: (bytes) result
         """
-        self._write(cmd)
-        success, answer = self._read()
+        if self._pipe:
+            # keep the order of commands queued so far
+            self._flush()
+        if self._rx_thread is not None:
+            future = Future()
+            self._send([(cmd, None, future)])
+            return future.result(timeout=self.ASYNC_TIMEOUT)
+        self.logger.debug("Writing %s", cmd)
+        self.serial.write(cmd)
+        if expected is None:
+            expected = self._expected_len(cmd)
+        success, answer = self._read(expected)
         if success:
             return answer
         else:
-            raise Exception("Command {} did not receive ACK".format(cmd.decode()))
+            raise Exception("Command {} did not receive ACK".format(cmd.decode().rstrip()))
+
+    def _submit(self, cmd, parse=None, expected=None):
+        """
+        Executes a given command, or queues it if called inside pipeline(). With async_io the
+        command is sent and the future is resolved by the background reader.
+        :param cmd: (bytes) CR terminated command to send. e.g. b"GETS\r"
+        :param parse: (callable) optional function applied to the result
+        :param expected: (int) expected reply length, looked up from the command if None
+        :return: (Future) resolving to the (parsed) result
+        """
+        future = Future()
+        if self._pipe is not None:
+            self._pipe.append((cmd, parse, future))
+        elif self._rx_thread is not None:
+            self._send([(cmd, parse, future)])
+        else:
+            answer = self._execute(cmd, expected)
+            future.set_result(answer if parse is None else parse(answer))
+        return future
+
+    def _flush(self):
+        """
+        Sends all queued commands in a single write and resolves their futures. With async_io the
+        futures are resolved by the background reader and failures are not raised here.
+        """
+        pipe, self._pipe = self._pipe, []
+        if not pipe:
+            return
+        if self._rx_thread is not None:
+            try:
+                self._send(pipe)
+            except Exception:
+                self._fail_futures(pipe, "Pipeline failed")
+                raise
+            return
+        try:
+            batch = b"".join(cmd for cmd, _, _ in pipe)
+            self.logger.debug("Writing %s", batch)
+            self.serial.write(batch)
+            failed = []
+            # read one reply per command, so later commands do not see stale replies
+            for cmd, parse, future in pipe:
+                success, answer = self._read(self._expected_len(cmd))
+                if not success:
+                    failed.append(cmd)
+                    future.set_exception(Exception("Command {} did not receive ACK".format(cmd.decode().rstrip())))
+                    continue
+                try:
+                    future.set_result(answer if parse is None else parse(answer))
+                except Exception as e:
+                    failed.append(cmd)
+                    future.set_exception(e)
+            if failed:
+                raise Exception("Commands {} failed".format(", ".join(cmd.decode().rstrip() for cmd in failed)))
+        finally:
+            self._fail_futures(pipe, "Pipeline failed")
+
+    def _send(self, entries):
+        """
+        Registers commands as pending and writes them in one go, used with async_io
+        :param entries: (list) (cmd, parse, future) tuples
+        """
+        batch = b"".join(cmd for cmd, _, _ in entries)
+        # the lock keeps the pending order in line with the write order
+        with self._rx_lock:
+            if not self._rx_running:
+                raise Exception("Background reader for {} is not running".format(self.port)) from self._rx_error
+            self._pending.extend(entries)
+            self._sent += len(entries)
+            self.logger.debug("Writing %s", batch)
+            self.serial.write(batch)
+
+    @staticmethod
+    def _fail_futures(entries, reason):
+        """
+        Fails the futures of all commands that are not resolved yet
+        :param entries: (iterable) (cmd, parse, future) tuples
+        :param reason: (str) start of the exception message
+        """
+        for cmd, _, future in entries:
+            if not future.done():
+                future.set_exception(Exception("{} before {} was answered".format(reason, cmd.decode().rstrip())))
+
+    def _fail_pending(self, reason):
+        """
+        Fails all commands still waiting for a reply, used with async_io
+        :param reason: (str) start of the exception message
+        """
+        with self._rx_lock:
+            pending, self._pending = self._pending, deque()
+        self._fail_futures(pending, reason)
+
+    def _rx_loop(self):
+        """
+        Background reader for async_io, stops and fails all pending commands on serial errors
+        """
+        try:
+            self._rx_frames()
+        except Exception as e:
+            self.logger.error("Background reader for %s stopped: %s", self.port, e)
+            with self._rx_lock:
+                self._rx_error = e
+                self._rx_running = False
+            self._fail_pending("Background reader stopped")
+
+    def _rx_frames(self):
+        """
+        Splits the received stream at ACK and resolves the pending futures in order
+        """
+        buffer = bytearray()
+        # number of pending commands taken off the queue
+        answered = 0
+        while self._rx_running:
+            sent = self._sent
+            chunk = self.serial.read(self.serial.in_waiting or 1)
+            if not chunk:
+                # serial timeout without any reply, fail the oldest command like the synchronous path,
+                # but only if it was written before the read started
+                with self._rx_lock:
+                    entry = self._pending.popleft() if answered < sent and self._pending else None
+                if entry is not None:
+                    answered += 1
+                    buffer.clear()
+                    entry[2].set_exception(Exception("Command {} did not receive ACK".format(
+                        entry[0].decode().rstrip())))
+                continue
+            buffer += chunk
+            while True:
+                end = buffer.find(self._TERM)
+                if end < 0:
+                    break
+                end += len(self._TERM)
+                frame = bytes(buffer[:end])
+                del buffer[:end]
+                self.logger.debug("Received answer %s", frame)
+                with self._rx_lock:
+                    entry = self._pending.popleft() if self._pending else None
+                if entry is None:
+                    self.logger.warning("Discarding unexpected answer %s", frame)
+                    continue
+                answered += 1
+                cmd, parse, future = entry
+                answer = frame[:-len(self._TERM)].rstrip(self.CR)
+                try:
+                    future.set_result(answer if parse is None else parse(answer))
+                except Exception as e:
+                    future.set_exception(e)
+
+    def _apply(self, cmd, attr, value):
+        """
+        Submits a setter command and tracks the device state it leads to. The value is stored
+        right away, so later calls compare against queued and in flight commands too.
+        :param cmd: (bytes) CR terminated command to send. e.g. b"VOLT120\r"
+        :param attr: (str) name of the state attribute, e.g. "_last_volt"
+        :param value: value the command sets
+        :return: (Future) result of _submit with async_io, else (bool) True
+        """
+        setattr(self, attr, value)
+        try:
+            future = self._submit(cmd, expected=self._ACK_LEN)
+        except Exception:
+            # the device may have applied the command anyway
+            setattr(self, attr, None)
+            raise
+        self._forget_on_failure(future, attr)
+        if self._rx_thread is None:
+            return True
+        # nobody may ever look at the future, make failures visible
+        def log_failure(f):
+            if f.exception() is not None:
+                self.logger.error("%s", f.exception())
+        future.add_done_callback(log_failure)
+        return future
+
+    def _unchanged(self):
+        """
+        Result of a setter call that is skipped because the value is already set
+        :return: (bool) True, with async_io an already resolved (Future) like _apply returns
+        """
+        if self._rx_thread is None:
+            return True
+        future = Future()
+        future.set_result(b"")
+        return future
+
+    def _forget_on_failure(self, future, attr):
+        """
+        Forgets the tracked device state if the command failed, the device may or may not have
+        applied it
+        :param future: (Future) result of _submit
+        :param attr: (str) name of the state attribute, e.g. "_last_volt"
+        """
+        def callback(f):
+            if f.exception() is not None:
+                setattr(self, attr, None)
+        future.add_done_callback(callback)
+
+    def invalidate_state(self):
+        """
+        Forgets the last set values, e.g. after changes on the front panel, so the next setter
+        calls are sent to the device again
+        """
+        self._last_volt = None
+        self._last_curr = None
+        self._last_out = None
+
+    @contextmanager
+    def pipeline(self):
+        """
+        Queues setter and *_async commands and sends them in a single write when the context exits,
+        replies are drained afterwards. Synchronous getters flush the queue before they execute.
+        Nested pipelines join the outer one, which sends the queue. If the context raises, the
+        queued commands are not sent and their futures fail.
+        :return: (HCS) self
+        """
+        if self._pipe is not None:
+            yield self
+            return
+        self._pipe = []
+        try:
+            yield self
+            self._flush()
+        finally:
+            pipe, self._pipe = self._pipe, None
+            self._fail_futures(pipe, "Pipeline aborted")
 
     def get_max(self):
         """
         Queries max voltage and current
-        :return: (tuple) max_voltage, max_voltage
+        :return: (tuple) max_voltage, max_current
+        """
+        result = self._execute(self._CMD_GMAX)
+        return self._parse_set(result)
+
+    def rescan(self):
         """
-        result = self._execute(b"GMAX")
-        return self._parse_result(result, self.SET_DECIMALS)
+        Drops the cached max ratings and queries them again from the device
+        :return: (tuple) max_voltage, max_current
+        """
+        _GMAX_CACHE.pop((self.port, type(self).__name__), None)
+        self.max_voltage, self.max_current = _GMAX_CACHE[(self.port, type(self).__name__)] = self.get_max()
+        return self.max_voltage, self.max_current
 
     @staticmethod
-    def _parse_result(result, decimals):
+    def _parse_result_raw(result, width_u):
+        """
+        Parse result bytes into scaled integers for voltage and current
+        :param result: (bytes) result read from serial
+        :param width_u: (int) number of voltage digits
+        :return: (tuple) voltage, current as integers, e.g. (120, 5) for 12.0V and 0.5A
+        """
+        if len(result) <= width_u:
+            raise ValueError("Reply {} too short".format(result))
+        # fixed width ASCII digits, parsed without float()
+        voltage = 0
+        for digit in result[:width_u]:
+            if not 0x30 <= digit <= 0x39:
+                raise ValueError("Invalid digit in reply {}".format(result))
+            voltage = voltage * 10 + digit - 0x30
+        current = 0
+        for digit in result[width_u:]:
+            if not 0x30 <= digit <= 0x39:
+                raise ValueError("Invalid digit in reply {}".format(result))
+            current = current * 10 + digit - 0x30
+        return voltage, current
+
+    @staticmethod
+    def _parse_result(result, width_u, scale_u, scale_i):
         """
         Parse result bytes into floats for voltage and current
         :param result: (bytes) result read from serial
-        :return:
+        :param width_u: (int) number of voltage digits
+        :param scale_u: (int) voltage scaling, 10**decimals
+        :param scale_i: (int) current scaling, 10**decimals
+        :return: (tuple) voltage, current
         """
-        if decimals["U"] is None or decimals["I"] is None:
+        if scale_u is None or scale_i is None:
             raise NotImplementedError
-        voltage = float(result[0:(2 + decimals["U"])]) / 10 ** decimals["U"]
-        current = float(result[(2 + decimals["I"]):]) / 10 ** decimals["I"]
-        return voltage, current
+        voltage, current = HCS._parse_result_raw(result, width_u)
+        return voltage / scale_u, current / scale_i
+
+    def _parse_set(self, result):
+        """
+        Parse a setpoint style result (GETS, GMAX)
+        :param result: (bytes) result read from serial
+        :return: (tuple) voltage, current
+        """
+        return self._parse_result(result, self.SET_WIDTH_U, self.SET_SCALE_U, self.SET_SCALE_I)
+
+    def _parse_display(self, result):
+        """
+        Parse a display style result (GETD) without the CC flag
+        :param result: (bytes) result read from serial
+        :return: (tuple) voltage, current
+        """
+        return self._parse_result(result, self.DISP_WIDTH_U, self.DISP_SCALE_U, self.DISP_SCALE_I)
 
     def set_output(self, on):
         """
         Set output on/off
         :param on: (bool)
-        :return:
+        :return: (bool) True, inside pipeline() already before the command is sent. With async_io a
+        (Future) resolving once the device acknowledged the command
         """
-        value = b"0" if on else b"1"
-        self._execute(b"SOUT" + value)
-        return True
+        on = bool(on)
+        if on == self._last_out:
+            return self._unchanged()
+        cmd = self._CMD_ENABLE if on else self._CMD_DISABLE
+        return self._apply(cmd, "_last_out", on)
 
     def enable(self):
         """
@@ -165,65 +620,81 @@ class HCS:
         Gets the preset voltage/current values
         :return: (tuple) voltage, current
         """
-        result = self._execute(b"GETS")
-        return self._parse_result(result, self.SET_DECIMALS)
+        result = self._execute(self._CMD_GETS)
+        return self._parse_set(result)
+
+    def get_preset_raw(self):
+        """
+        Gets the preset voltage/current values as integers scaled by SET_SCALE_U/SET_SCALE_I,
+        e.g. (120, 5) for 12.0V and 0.5A on a HCS-3202
+        :return: (tuple) voltage, current
+        """
+        if self.SET_WIDTH_U is None:
+            raise NotImplementedError
+        result = self._execute(self._CMD_GETS)
+        return self._parse_result_raw(result, self.SET_WIDTH_U)
+
+    def get_preset_async(self):
+        """
+        Gets the preset voltage/current values, deferred until the end of a pipeline
+        :return: (Future) resolving to (tuple) voltage, current
+        """
+        return self._submit(self._CMD_GETS, self._parse_set)
 
     def get_display(self):
         """
         Gets the preset voltage/current values and wether supply is in CC mode (else it is CV)
         :return: (tuple) voltage, current, cc
         """
-        result = self._execute(b"GETD")
-        cc = True if result[-1:] == b"1" else False
-        return *self._parse_result(result[:-1], self.DISPLAY_DECIMALS), cc
+        result = self._execute(self._CMD_GETD)
+        # last byte is the CC flag, compared as int to avoid slicing
+        cc = result[-1] == 0x31
+        return *self._parse_display(result[:-1]), cc
 
     def set_voltage(self, voltage):
         """
         Sets the desired voltage, raises if voltage >= soft limit
         :param voltage: (float)
-        :return:
+        :return: (bool) True, inside pipeline() already before the command is sent. With async_io a
+            (Future) resolving once the device acknowledged the command
         """
         assert voltage <= self.limit_voltage,\
             "Invalid range! {}V > limit of {}V".format(voltage, self.limit_voltage)
         assert voltage > 0, "Negative voltage given"
         if voltage < self.min_voltage:
-            self.logger.warning("Given voltage {}V < {}V minimum, setting to minimum voltage".format(voltage,
-                                                                                                 self.min_voltage))
+            self.logger.warning("Given voltage %sV < %sV minimum, setting to minimum voltage", voltage,
+                                self.min_voltage)
             voltage = self.min_voltage
-        voltage_bytes = "{:0{}d}".format(round(voltage * 10**self.SET_DECIMALS["U"]),
-                                         self.SET_DECIMALS["U"] + 2).encode()
-        self._execute(b"VOLT" + voltage_bytes)
-        return True
+        value = round(voltage * self.SET_SCALE_U)
+        if value == self._last_volt:
+            return self._unchanged()
+        return self._apply(self._VOLT_FRAME % value, "_last_volt", value)
 
     def set_current(self, current):
         """
         Sets the desired current, raises if current >= soft limit
         :param current: (float)
-        :return:
+        :return: (bool) True, inside pipeline() already before the command is sent. With async_io a
+            (Future) resolving once the device acknowledged the command
         """
         assert current <= self.limit_current,\
             "Invalid range! {}A > limit of {}A".format(current, self.limit_current)
         assert current > 0, "Negative current given"
         if current < self.min_current:
-            self.logger.warning("Given current {}A < {}A minimum, setting to minimum current".format(current,
-                                                                                                 self.min_current))
+            self.logger.warning("Given current %sA < %sA minimum, setting to minimum current", current,
+                                self.min_current)
             current = self.min_current
-        current_bytes = "{:0{}d}".format(round(current * 10 ** self.SET_DECIMALS["I"]),
-                                         self.SET_DECIMALS["I"] + 2).encode()
-        self._execute(b"CURR" + current_bytes)
-        return True
+        value = round(current * self.SET_SCALE_I)
+        if value == self._last_curr:
+            return self._unchanged()
+        return self._apply(self._CURR_FRAME % value, "_last_curr", value)
 
 
 class HCS3202(HCS):
-    SET_DECIMALS = {
-        "U": 1,
-        "I": 1
-    }
-
-    DISPLAY_DECIMALS = {
-        "U": 2,
-        "I": 2
-    }
+    SET_DEC_U = 1
+    SET_DEC_I = 1
+    DISP_DEC_U = 2
+    DISP_DEC_I = 2
 
     DEVICE_LIMITS = {
         "U": 0.8,
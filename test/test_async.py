@@ -0,0 +1,67 @@
+import pytest
+
+from hcs import HCS3202
+
+PORT = "/dev/ttyUSB0"
+
+
+@pytest.fixture(scope="module")
+def device():
+    with HCS3202(PORT, async_io=True) as d:
+        yield d
+
+
+class TestAsync:
+    def test_set_get_async(self, device):
+        # act
+        target_voltage = 9.0
+        result = device.set_voltage(target_voltage)
+        voltage, current = device.get_preset_async().result(timeout=5)
+        # assert
+        assert result.exception(timeout=5) is None
+        assert round(voltage * HCS3202.SET_SCALE_U) == round(target_voltage * HCS3202.SET_SCALE_U)
+
+    def test_set_unchanged_async(self, device):
+        # act
+        device.set_voltage(7.0).result(timeout=5)
+        result = device.set_voltage(7.0)
+        # assert
+        assert result.exception(timeout=5) is None
+
+    def test_pipeline_async(self, device):
+        # act
+        target_voltage = 8.0
+        target_current = 0.4
+        with device.pipeline():
+            voltage_result = device.set_voltage(target_voltage)
+            current_result = device.set_current(target_current)
+            preset = device.get_preset_async()
+        voltage, current = preset.result(timeout=5)
+        # a synchronous getter after the pipeline sees the same state
+        sync_voltage, sync_current = device.get_preset_raw()
+        # assert
+        assert voltage_result.exception(timeout=5) is None
+        assert current_result.exception(timeout=5) is None
+        assert round(voltage * HCS3202.SET_SCALE_U) == round(target_voltage * HCS3202.SET_SCALE_U)
+        assert round(current * HCS3202.SET_SCALE_I) == round(target_current * HCS3202.SET_SCALE_I)
+        assert (sync_voltage, sync_current) == (round(voltage * HCS3202.SET_SCALE_U),
+                                                round(current * HCS3202.SET_SCALE_I))
+
+    def test_set_back_in_flight(self, device):
+        # act
+        device.set_voltage(12.0).result(timeout=5)
+        device.set_voltage(5.0)
+        result = device.set_voltage(12.0)
+        voltage, current = device.get_preset_raw()
+        # assert
+        assert result.exception(timeout=5) is None
+        assert voltage == round(12.0 * HCS3202.SET_SCALE_U)
+
+    def test_output_toggle_in_flight(self, device):
+        # act
+        device.enable().result(timeout=5)
+        device.disable()
+        result = device.enable()
+        # assert
+        assert result.exception(timeout=5) is None
+        assert device._last_out is True
@@ -8,22 +8,24 @@ VOLTAGES = np.linspace(1, 10, 2)
 CURRENTS = np.linspace(0.1, 2, 2)
 
 
+@pytest.fixture(scope="module")
+def device():
+    with HCS3202(PORT) as d:
+        yield d
+
+
 class TestSetter:
     @pytest.mark.parametrize("voltage", VOLTAGES)
-    def test_set_voltage(self, voltage):
-        # assemble
-        with HCS3202(PORT) as device:
-            # act
-            result = device.set_voltage(voltage)
+    def test_set_voltage(self, device, voltage):
+        # act
+        result = device.set_voltage(voltage)
         # assert
         assert result
 
-    def test_set_negative(self):
-        # assemble
-        with HCS3202(PORT) as device:
-            # act & assert
-            with pytest.raises(AssertionError, match=r"^Negative.*"):
-                result = device.set_voltage(-1)
+    def test_set_negative(self, device):
+        # act & assert
+        with pytest.raises(AssertionError, match=r"^Negative.*"):
+            result = device.set_voltage(-1)
 
     def test_set_over(self):
         # assemble
@@ -33,20 +35,16 @@ class TestSetter:
                 result = device.set_voltage(90)
 
     @pytest.mark.parametrize("current", CURRENTS)
-    def test_set_current(self, current):
-        # assemble
-        with HCS3202(PORT) as device:
-            # act
-            result = device.set_current(current)
+    def test_set_current(self, device, current):
+        # act
+        result = device.set_current(current)
         # assert
         assert result
 
-    def test_set_negative(self):
-        # assemble
-        with HCS3202(PORT) as device:
-            # act & assert
-            with pytest.raises(AssertionError, match=r"^Negative.*"):
-                result = device.set_current(-1)
+    def test_set_negative(self, device):
+        # act & assert
+        with pytest.raises(AssertionError, match=r"^Negative.*"):
+            result = device.set_current(-1)
 
     def test_set_over(self):
         # assemble
@@ -57,38 +55,86 @@ class TestSetter:
 
 
 class TestGetter:
-    def test_get_preset(self):
-        # assemble
-        with HCS3202(PORT) as device:
-            # act
-            voltage, current = device.get_preset()
+    def test_get_preset(self, device):
+        # act
+        voltage, current = device.get_preset()
         # assert no error occurs
 
-    def test_get_display(self):
-        # assemble
-        with HCS3202(PORT) as device:
-            # act
-            voltage, current, cv = device.get_display()
+    def test_get_display(self, device):
+        # act
+        voltage, current, cv = device.get_display()
         # assert no error occurs
 
 
 class TestSetGet:
-    def test_set_get_voltage(self):
-        # assemble
-        with HCS3202(PORT) as device:
-            # act
-            target_voltage = 12.0
+    def test_set_get_voltage(self, device):
+        # act
+        target_voltage = 12.0
+        result = device.set_voltage(target_voltage)
+        voltage, current = device.get_preset_raw()
+        # assert
+        assert voltage == round(target_voltage * HCS3202.SET_SCALE_U)
+
+    def test_set_get_current(self, device):
+        # act
+        target_current = 0.5
+        result = device.set_current(target_current)
+        voltage, current = device.get_preset_raw()
+        # assert
+        assert current == round(target_current * HCS3202.SET_SCALE_I)
+
+
+class TestPipeline:
+    def test_pipeline_get_preset_async(self, device):
+        # act
+        target_voltage = 11.0
+        with device.pipeline():
             result = device.set_voltage(target_voltage)
-            voltage, current = device.get_preset()
+            preset = device.get_preset_async()
+        voltage, current = preset.result(timeout=5)
+        # assert
+        assert result
+        assert round(voltage * HCS3202.SET_SCALE_U) == round(target_voltage * HCS3202.SET_SCALE_U)
+
+    def test_pipeline_nested(self, device):
+        # act
+        with device.pipeline():
+            outer = device.get_preset_async()
+            with device.pipeline():
+                inner = device.get_preset_async()
+        # assert
+        assert outer.result() == inner.result()
+
+    def test_pipeline_aborted(self, device):
+        # act
+        with pytest.raises(RuntimeError):
+            with device.pipeline():
+                preset = device.get_preset_async()
+                raise RuntimeError
+        # assert
+        with pytest.raises(Exception, match=r"^Pipeline aborted.*"):
+            preset.result(timeout=1)
+
+
+
+class TestStateCache:
+    def test_set_back_in_pipeline(self, device):
+        # act
+        device.set_voltage(12.0)
+        with device.pipeline():
+            device.set_voltage(5.0)
+            device.set_voltage(12.0)
+        voltage, current = device.get_preset_raw()
         # assert
-        assert voltage == target_voltage
+        assert voltage == round(12.0 * HCS3202.SET_SCALE_U)
 
-    def test_set_get_current(self):
+    def test_invalidate_state(self, device):
         # assemble
-        with HCS3202(PORT) as device:
-            # act
-            target_current = 0.5
-            result = device.set_current(target_current)
-            voltage, current = device.get_preset()
+        device.set_voltage(6.0)
+        # act
+        device.invalidate_state()
         # assert
-        assert current == target_current
+        assert (device._last_volt, device._last_curr, device._last_out) == (None, None, None)
+        assert device.set_voltage(6.0)
+        voltage, current = device.get_preset_raw()
+        assert voltage == round(6.0 * HCS3202.SET_SCALE_U)